@@ -5,18 +5,25 @@ Enhanced single‑file Flask app with:
 - URL or file shortening (mutually exclusive)
 - 10‑minute TTL for **both** links **and** files (auto‑pruned background thread)
 - Live TTL countdown on main page **and** /admin dashboard
+- Live hit counts on /admin pushed over Server‑Sent Events (`/admin/events`)
 - `/api/metadata/<code>` JSON endpoint
 - Copy + QR buttons with toast
 - Dark / light mode toggle with `localStorage` persistence
 - **Hostname‑to‑IP auto‑redirect** so QR codes always resolve on mobile
-- **Quiet logging**: `/api/metadata/*` requests no longer spam the console
+- **Quiet logging**: `/api/metadata/*`, `/static/*` and `/qr/*` requests no longer spam the console
 """
 
-import os, threading, time, string, random, sqlite3, io, socket, logging
+import os, threading, time, sqlite3, io, socket, logging, queue, tempfile, json
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from secrets import token_urlsafe
 from flask import (
-    Flask, request, redirect, render_template_string,
+    Flask, Request, Response, request, redirect,
     send_from_directory, send_file, jsonify
 )
+from markupsafe import escape
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 from werkzeug.serving import WSGIRequestHandler
 import qrcode
@@ -26,21 +33,118 @@ DB_FILE = "urls.db"
 UPLOAD_FOLDER = os.path.join("static", "uploads")
 PORT = 5050
 DELETE_AFTER_SECONDS = 10 * 60  # 10 minutes
+DB_POOL_SIZE = 8                # long-lived reader connections
+CLEANUP_BATCH = 500             # rows purged per write transaction
+CLEANUP_PAUSE = 0.05            # seconds between batches so other writers get in
+HITS_FLUSH_INTERVAL = 1         # seconds between hit-counter flushes
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024  # reject larger request bodies with 413
+EVENTS_KEEPALIVE = 15           # seconds between SSE keep-alive comments
+WSGI_THREADS = 8                # waitress worker threads
+# Each open /admin/events stream pins one worker thread for as long as the tab
+# is open, so cap them at half the pool; extra tabs are told to retry later.
+EVENTS_MAX_STREAMS = WSGI_THREADS // 2
+EVENTS_BUSY_RETRY_MS = 30000    # EventSource reconnect delay when at the cap
+
+def resolve_local_ip() -> str:
+    # connect() on a UDP socket sends nothing; it just makes the kernel pick
+    # the source address of the outbound route, with no DNS lookup.
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect(("8.8.8.8", 80))
+        return s.getsockname()[0]
+    except OSError:  # no route (offline host)
+        return socket.gethostbyname(socket.gethostname())
+    finally:
+        s.close()
 
 # Resolve local IP once at startup (used for stable base URL)
 HOSTNAME   = socket.gethostname().split(".")[0]  # bare hostname
-LOCAL_IP   = socket.gethostbyname(socket.gethostname())
+LOCAL_IP   = resolve_local_ip()
 BASE_URL   = f"http://{LOCAL_IP}:{PORT}/"  # what we want everyone to use
+IP_HOSTS   = frozenset({LOCAL_IP, f"{LOCAL_IP}:{PORT}"})  # Host headers needing no redirect
 
 # ── Flask app ─────────────────────────────────────────────────────────────
+
+# Process umask, read once before any threads start (os.umask can only be
+# read by setting it). Temp files are created 0600, so saved uploads get
+# 0666 & ~UMASK applied, like a plain open() would give them.
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+class UploadRequest(Request):
+    # Stream multipart file parts straight into a temp file inside
+    # UPLOAD_FOLDER (instead of Werkzeug's spool), so saving is just a rename.
+    # Every part is tracked here, even ones the parser never got to hand back.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.part_files = []
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        part = tempfile.NamedTemporaryFile("wb+", dir=UPLOAD_FOLDER, prefix=".part-", delete=False)
+        self.part_files.append(part)
+        return part
+
 app = Flask(__name__)
+app.request_class = UploadRequest
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+app.jinja_env.auto_reload = False  # the only template is compiled once below
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+@app.teardown_request
+def discard_unsaved_uploads(exc=None):
+    # Runs on every path (parse errors, 413, disconnects, exceptions): any part
+    # upload_file() didn't rename into place is still a .part-* file.
+    for part in request.part_files:
+        part.close()
+        try:
+            os.remove(part.name)
+        except FileNotFoundError:
+            pass
+
 # ── Database helpers ──────────────────────────────────────────────────────
+# Connections are opened once and reused so every request skips the file
+# open and keeps SQLite's per-connection page cache warm. Reads check out one
+# of DB_POOL_SIZE pooled connections; all writes go through a single writer
+# connection guarded by a lock to avoid SQLITE_BUSY between our own threads.
+
+DB_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-5000",       # ~5 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=67108864",     # 64 MB
+)
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False, isolation_level=None)
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+_reader_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+for _ in range(DB_POOL_SIZE):
+    _reader_pool.put(_connect())
+
+_writer_conn = _connect()
+_writer_lock = threading.Lock()
+
+@contextmanager
+def db():
+    conn = _reader_pool.get()
+    try:
+        yield conn
+    finally:
+        _reader_pool.put(conn)
+
+@contextmanager
+def db_write():
+    with _writer_lock:
+        yield _writer_conn
 
 def init_db():
-    with sqlite3.connect(DB_FILE) as conn:
+    with db_write() as conn:
+        # WAL is persistent in the DB file; readers never block on the writer
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS urls (
@@ -51,56 +155,189 @@ def init_db():
             )
             """
         )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_created_at ON urls(created_at)")
 
 init_db()
 
 def generate_code(length: int = 6) -> str:
-    return "".join(random.choices(string.ascii_letters + string.digits, k=length))
-
-def save_mapping(code: str, target: str):
-    with sqlite3.connect(DB_FILE) as conn:
+    return token_urlsafe(length)[:length]
+
+def save_mapping(code: str, target: str) -> str:
+    # A custom code deliberately overwrites any existing mapping; a generated
+    # one must be new, so on the (rare) collision we just draw another.
+    # Cached state for the code is dropped after the write but still under the
+    # writer lock, so a hit flush can't interleave. metadata() reads without
+    # that lock and may re-cache a prefix built from the old row; it guards
+    # against that by re-validating the entry against the row on every hit.
+    if not code:
+        while True:
+            code = generate_code()
+            try:
+                with db_write() as conn:
+                    conn.execute(
+                        "INSERT INTO urls (code, target, created_at, hits) VALUES (?,?,?,0)",
+                        (code, target, int(time.time()))
+                    )
+                    forget_code(code)
+                return code
+            except sqlite3.IntegrityError:
+                continue
+    with db_write() as conn:
+        # UPSERT updates the row in place; INSERT OR REPLACE would delete + reinsert
         conn.execute(
-            "INSERT OR REPLACE INTO urls (code, target, created_at, hits) VALUES (?,?,?,0)",
+            "INSERT INTO urls (code, target, created_at, hits) VALUES (?,?,?,0) "
+            "ON CONFLICT(code) DO UPDATE SET target=excluded.target, created_at=excluded.created_at, hits=0",
             (code, target, int(time.time()))
         )
+        forget_code(code)
+    return code
+
+def forget_code(code: str):
+    # call with the writer lock held, right after (re)creating the mapping
+    with hits_lock:
+        pending_hits.pop(code, None)  # a re-used code starts from zero hits
+    meta_cache.pop(code, None)
+    publish_hits({code: 0})
 
 def get_row(code: str):
-    with sqlite3.connect(DB_FILE) as conn:
+    with db() as conn:
         return conn.execute(
             "SELECT code, target, created_at, hits FROM urls WHERE code = ?",
             (code,)
         ).fetchone()
 
-def seconds_left(created_at: int) -> int:
-    return max(0, DELETE_AFTER_SECONDS - (int(time.time()) - created_at))
+# /api/metadata/<code> JSON up to the mutable fields: target and created_at
+# never change for a mapping, so only expires_in and hits are spliced in per
+# poll. The values the prefix was built from are kept to re-validate it.
+meta_cache: "dict[str, tuple[bytes, int, str]]" = {}  # code -> (json prefix, created_at, target)
+
+def seconds_left(created_at: int, now: "int | None" = None) -> int:
+    if now is None:
+        now = int(time.time())
+    return max(0, DELETE_AFTER_SECONDS - (now - created_at))
 
 # ── Cleanup daemon ────────────────────────────────────────────────────────
 
+# Oldest-first slice of expired rows; ordering by the index keeps the SELECT
+# and DELETE below looking at the same rows within one transaction. Returns
+# the number of rows deleted so the caller knows when the backlog is drained.
+_EXPIRED_BATCH = "SELECT rowid FROM urls WHERE created_at < ? ORDER BY created_at, rowid LIMIT ?"
+
+def purge_expired_batch(cutoff: int) -> int:
+    with db_write() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired_files = conn.execute(
+                f"SELECT target FROM urls WHERE rowid IN ({_EXPIRED_BATCH}) AND target GLOB '/uploads/*'",
+                (cutoff, CLEANUP_BATCH),
+            ).fetchall()
+            for (tgt,) in expired_files:
+                # targets can come from the url field; never follow one out of the folder
+                path = safe_join(UPLOAD_FOLDER, tgt[len("/uploads/"):])
+                if path and os.path.isfile(path):
+                    try:
+                        os.remove(path)
+                    except Exception:
+                        pass
+            cur = conn.execute(
+                f"DELETE FROM urls WHERE rowid IN ({_EXPIRED_BATCH})",
+                (cutoff, CLEANUP_BATCH),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return cur.rowcount
+
+def sweep_stale_parts(cutoff: int):
+    # .part-* files orphaned by a crash mid-upload; live ones are still being written to
+    for entry in os.scandir(UPLOAD_FOLDER):
+        if entry.name.startswith(".part-"):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
 def cleanup(interval: int = 60):
     while True:
-        now = int(time.time())
-        with sqlite3.connect(DB_FILE) as conn:
-            expired = conn.execute(
-                "SELECT code, target FROM urls WHERE ? - created_at > ?",
-                (now, DELETE_AFTER_SECONDS),
-            ).fetchall()
-            for code, tgt in expired:
-                if tgt.startswith("/uploads/"):
-                    path = os.path.join(UPLOAD_FOLDER, tgt.replace("/uploads/", "", 1))
-                    if os.path.isfile(path):
-                        try:
-                            os.remove(path)
-                        except Exception:
-                            pass
-                conn.execute("DELETE FROM urls WHERE code = ?", (code,))
+        cutoff = int(time.time()) - DELETE_AFTER_SECONDS
+        try:
+            # release the writer between batches so uploads and hit counts interleave
+            while purge_expired_batch(cutoff) == CLEANUP_BATCH:
+                time.sleep(CLEANUP_PAUSE)
+            for code, (_, created_at, _) in list(meta_cache.items()):
+                if created_at < cutoff:
+                    meta_cache.pop(code, None)
+            sweep_stale_parts(cutoff)
+        except Exception:
+            # e.g. database locked / unlink refused: log and try again next cycle
+            logging.exception("cleanup cycle failed; retrying next interval")
         time.sleep(interval)
 
 threading.Thread(target=cleanup, daemon=True).start()
 
+# ── Hit counter (buffered in memory, flushed by a daemon) ─────────────────
+# Redirects only bump an in-memory Counter; one write transaction per
+# HITS_FLUSH_INTERVAL applies the whole batch instead of one UPDATE per hit.
+# After each commit the new absolute totals of the touched codes are pushed
+# to every /admin/events subscriber (publishing happens under the writer lock,
+# so subscribers see totals in commit order).
+
+pending_hits: Counter = Counter()
+hits_lock = threading.Lock()
+hit_subscribers: "set[queue.Queue[dict]]" = set()
+
+def publish_hits(totals: dict):
+    for sub in list(hit_subscribers):
+        sub.put(totals)
+
+def flush_hits() -> Counter:
+    global pending_hits
+    if not pending_hits:
+        return Counter()
+    # Swap and commit under one writer lock so save_mapping() can't reset a
+    # code in between and then receive the previous link's hits.
+    with db_write() as conn:
+        with hits_lock:
+            batch, pending_hits = pending_hits, Counter()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE urls SET hits = hits + ? WHERE code = ?",
+                [(n, code) for code, n in batch.items()],
+            )
+            totals = dict(conn.execute(
+                "SELECT code, hits FROM urls WHERE code IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(batch)),),
+            ).fetchall())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            with hits_lock:
+                pending_hits.update(batch)  # keep the hits for the next flush
+            raise
+        publish_hits(totals)
+    return batch
+
+def hits_flusher(interval: float = HITS_FLUSH_INTERVAL):
+    while True:
+        time.sleep(interval)
+        try:
+            flush_hits()
+        except Exception:
+            # e.g. database locked / disk full: the batch was re-queued, keep going
+            logging.exception("hit counter flush failed; retrying next interval")
+
+threading.Thread(target=hits_flusher, daemon=True).start()
+
 # ── Hostname → IP redirect (so QR codes using hostname still work) ────────
 
 @app.before_request
 def force_ip_host():
+    # fast path: already on the IP, or an API call (never reached via QR)
+    if request.host in IP_HOSTS or request.path.startswith("/api/"):
+        return None
     host = request.host.split(":")[0]
     if host != LOCAL_IP and host.startswith(HOSTNAME):
         return redirect(BASE_URL.rstrip("/") + request.full_path, code=301)
@@ -110,11 +347,28 @@ def force_ip_host():
 def make_short(code: str) -> str:
     return f"{BASE_URL}{code}"
 
-# ── Quiet request handler (skip /api/metadata/* lines) ────────────────────
+# QR output depends only on the code (BASE_URL is fixed), so PNG bytes can be
+# cached; a reused code maps to the same link and the same image.
+# Short links are short ASCII, so low error correction suffices, and a fixed
+# mask skips scoring all 8 candidate masks (qrcode.make()'s main cost). The
+# version is still fitted since custom codes and IPs vary in length.
+@lru_cache(maxsize=512)
+def qr_png(code: str) -> bytes:
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=6, border=4, mask_pattern=0)
+    qr.add_data(make_short(code))
+    qr.make(fit=True)
+    buf = io.BytesIO()
+    qr.make_image().save(buf)  # PNG by default on both the Pillow and pypng backends
+    return buf.getvalue()
+
+# ── Quiet request handler (skip polling / asset lines) ────────────────────
+# Only used by the Werkzeug dev server fallback in __main__.
+
+QUIET_PATHS = ("/api/metadata/", "/static/", "/qr/")
 
 class QuietHandler(WSGIRequestHandler):
     def log_request(self, code="-", size="-"):
-        if self.path.startswith("/api/metadata/"):
+        if self.path.startswith(QUIET_PATHS):
             return  # skip this noise
         super().log_request(code, size)
 
@@ -326,34 +580,47 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Compile once at import instead of going through render_template_string's
+# per-call lookup.
+PAGE_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+
+# GET / never has a short_url or error to show, so its page is a constant.
+INDEX_HTML = PAGE_TEMPLATE.render().encode()
+
 # ── Routes (unchanged except removed log-level tinkering) ─────────────────
 
 @app.route("/", methods=["GET"])
 def home():
-    return render_template_string(HTML_TEMPLATE)
+    return Response(INDEX_HTML, mimetype="text/html")
 
 @app.route("/upload", methods=["POST"])
 def upload_file():
     short_url = error_message = None
     file = request.files.get("file")
     url  = request.form.get("url", "").strip()
-    code = request.form.get("code", "").strip() or generate_code()
+    code = request.form.get("code", "").strip()  # empty → generated on save
 
     if (file and file.filename) and url:
         error_message = "Error: Provide EITHER a URL OR a file, not both."
     elif file and file.filename:
         filename = f"{int(time.time())}_{secure_filename(file.filename)}"
         path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-        file.save(path)
-        save_mapping(code, "/uploads/" + filename)
+        file.stream.close()
+        os.chmod(file.stream.name, 0o666 & ~UMASK)
+        os.replace(file.stream.name, path)
+        try:
+            code = save_mapping(code, "/uploads/" + filename)
+        except Exception:
+            os.remove(path)  # no row means cleanup() would never reclaim it
+            raise
         short_url = make_short(code)
     elif url:
-        save_mapping(code, url)
+        code = save_mapping(code, url)
         short_url = make_short(code)
     else:
         error_message = "Error: Please provide a file or a URL."
 
-    return render_template_string(HTML_TEMPLATE, short_url=short_url, error_message=error_message, ttl=DELETE_AFTER_SECONDS)
+    return PAGE_TEMPLATE.render(short_url=short_url, error_message=error_message, ttl=DELETE_AFTER_SECONDS)
 
 @app.route("/<code>")
 def redirect_code(code):
@@ -363,34 +630,41 @@ def redirect_code(code):
     code, target, created_at, _ = row
     if time.time() - created_at > DELETE_AFTER_SECONDS:
         return "Link expired", 410
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.execute("UPDATE urls SET hits = hits + 1 WHERE code = ?", (code,))
+    with hits_lock:
+        pending_hits[code] += 1
     if target.startswith("/uploads/"):
-        return send_from_directory(app.config["UPLOAD_FOLDER"], target.replace("/uploads/", "", 1), as_attachment=True)
+        # files are immutable per (code, created_at): let browsers revalidate with a 304
+        return send_from_directory(
+            app.config["UPLOAD_FOLDER"], target.replace("/uploads/", "", 1), as_attachment=True,
+            conditional=True, etag=f"{code}-{created_at}", last_modified=created_at,
+        )
     return redirect(target)
 
 @app.route("/qr/<code>")
 def qr_code(code):
     if not get_row(code):
         return "Not found", 404
-    img = qrcode.make(make_short(code))
-    buf = io.BytesIO(); img.save(buf); buf.seek(0)
-    return send_file(buf, mimetype="image/png")
+    return send_file(io.BytesIO(qr_png(code)), mimetype="image/png")
 
 @app.route("/admin")
 def admin():
     q = request.args.get("q", "").strip()
-    with sqlite3.connect(DB_FILE) as conn:
+    with db() as conn:
         if q:
             rows = conn.execute("SELECT code, target, created_at, hits FROM urls WHERE code LIKE ? OR target LIKE ? ORDER BY created_at DESC", (f"%{q}%", f"%{q}%")).fetchall()
         else:
             rows = conn.execute("SELECT code, target, created_at, hits FROM urls ORDER BY created_at DESC").fetchall()
-    out = "<h1>Admin</h1><form><input name='q' placeholder='Search' value='%s'><input type='submit' value='Search'></form>" % q
-    out += "<table border=1 cellpadding=5><tr><th>Code</th><th>Target</th><th>Created</th><th>Expires In</th><th>Hits</th></tr>"
+    parts = [
+        "<h1>Admin</h1><form><input name='q' placeholder='Search' value='%s'><input type='submit' value='Search'></form>" % escape(q),
+        "<table border=1 cellpadding=5><tr><th>Code</th><th>Target</th><th>Created</th><th>Expires In</th><th>Hits</th></tr>",
+    ]
+    now = int(time.time())
     for code, target, created_at, hits in rows:
-        expires = seconds_left(created_at)
-        out += f"<tr><td>{code}</td><td>{target}</td><td>{time.ctime(created_at)}</td><td><span class='admin-countdown' data-expiry='{expires}'>{expires}s</span></td><td><span class='admin-hits' data-code='{code}'>{hits}</span></td></tr>"
-    out += """
+        expires = seconds_left(created_at, now)
+        # DB hits only: /admin/events sends fresh totals (incl. later flushes) on connect
+        code = escape(code)
+        parts.append(f"<tr><td>{code}</td><td>{escape(target)}</td><td>{time.ctime(created_at)}</td><td><span class='admin-countdown' data-expiry='{expires}'>{expires}s</span></td><td><span class='admin-hits' data-code='{code}'>{hits}</span></td></tr>")
+    parts.append("""
     </table>
     <script>
       window.onload = function() {
@@ -407,35 +681,85 @@ def admin():
           }, 1000);
         });
 
-        function refreshHits() {
-          document.querySelectorAll('.admin-hits').forEach(el => {
-            fetch(`/api/metadata/${el.dataset.code}`)
-              .then(res => res.json())
-              .then(data => {
-                if (data.hits !== undefined) el.innerText = data.hits;
-              });
-          });
-        }
-        setInterval(refreshHits, 3000);
+        const hitEls = {};
+        document.querySelectorAll('.admin-hits').forEach(el => { hitEls[el.dataset.code] = el; });
+        // every message carries absolute totals (the first is a full snapshot),
+        // so a reconnect or a missed batch corrects itself
+        new EventSource('/admin/events').onmessage = e => {
+          const totals = JSON.parse(e.data);
+          for (const code in totals) {
+            const el = hitEls[code];
+            if (el) el.innerText = totals[code];
+          }
+        };
       }
     </script>
-    """
-    return out
+    """)
+    return "".join(parts)
+
+events_slots = threading.BoundedSemaphore(EVENTS_MAX_STREAMS)
+
+@app.route("/admin/events")
+def admin_events():
+    # Server-Sent Events: a snapshot of all hit totals on connect, then one
+    # message of {code: hits} per committed flush. Everything happens inside
+    # the generator so an unstarted response never leaks a slot or a queue.
+    def stream():
+        if not events_slots.acquire(blocking=False):
+            yield f"retry: {EVENTS_BUSY_RETRY_MS}\n: too many admin streams\n\n"
+            return
+        sub: "queue.Queue[dict]" = queue.Queue()
+        try:
+            # subscribe and snapshot atomically w.r.t. flushes: every commit is
+            # either in the snapshot or queued after it
+            with db_write() as conn:
+                hit_subscribers.add(sub)
+                snapshot = dict(conn.execute("SELECT code, hits FROM urls").fetchall())
+            yield f"retry: 3000\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                try:
+                    totals = sub.get(timeout=EVENTS_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"  # also surfaces dead clients
+                    continue
+                yield f"data: {json.dumps(totals)}\n\n"
+        finally:
+            hit_subscribers.discard(sub)
+            events_slots.release()
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.route("/api/metadata/<code>")
 def metadata(code):
-    row = get_row(code)
-    if not row:
-        return jsonify(error="Not found"), 404
-    _, target, created_at, hits = row
-    return jsonify({
-        "target": target,
-        "created_at": created_at,
-        "expires_in": seconds_left(created_at),
-        "hits": hits
-    })
+    cached = meta_cache.get(code)
+    if cached:
+        with db() as conn:
+            row = conn.execute("SELECT hits, created_at, target FROM urls WHERE code = ?", (code,)).fetchone()
+        # the prefix is valid only for the exact values it was built from, which
+        # also catches a stale prefix cached by a miss that raced save_mapping()
+        if row and row[1:] == cached[1:]:
+            prefix, created_at = cached[:2]
+            hits = row[0]
+        else:
+            meta_cache.pop(code, None)
+            cached = None
+    if not cached:
+        row = get_row(code)
+        if not row:
+            return jsonify(error="Not found"), 404
+        code, target, created_at, hits = row
+        prefix = ('{"target":%s,"created_at":%d,' % (json.dumps(target), created_at)).encode()
+        meta_cache[code] = (prefix, created_at, target)
+    body = prefix + b'"expires_in":%d,"hits":%d}' % (seconds_left(created_at), hits + pending_hits.get(code, 0))
+    return Response(body, mimetype="application/json")
 
 # ── Run ───────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     print(f"* Running on {BASE_URL} (CTRL+C to quit)")
-    app.run(host="0.0.0.0", port=PORT, request_handler=QuietHandler)
+    try:
+        from waitress import serve  # production WSGI server, if installed
+    except ImportError:
+        app.run(host="0.0.0.0", port=PORT, threaded=True, request_handler=QuietHandler)
+    else:
+        # admin SSE streams are capped at EVENTS_MAX_STREAMS of these threads
+        serve(app, host="0.0.0.0", port=PORT, threads=WSGI_THREADS)